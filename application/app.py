@@ -2,37 +2,53 @@
 # Copyright (c) 2019, Anders Lervik.
 # Distributed under the MIT License. See LICENSE for more info.
 """A flask application for serving the map."""
+import datetime
+import functools
+import logging
 import os
-from flask import Flask
+import threading
+from flask import Flask, send_file
 from create_web import create_web_site
 from common import MAP_FILE, TABLE_FILE
 
 app = Flask(__name__)
+LOGGER = logging.getLogger(__name__)
+# Concurrent requests in a new hour should create the web site only once:
+_CREATE_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _create_web_site(hour):
+    """Create the web site, at most once for the given hour."""
+    LOGGER.info('Creating web site for hour: %s', hour)
+    return create_web_site('places.json', os.environ['FROST_CLIENT_ID'])
 
 
 @app.route('/')
 def index():
     """Create the web site."""
-    html = create_web_site('places.json', os.environ['FROST_CLIENT_ID'])
+    # The web site is updated when we enter a new hour, so within the
+    # same hour we can reuse the html we already created:
+    hour = datetime.datetime.now().strftime('%Y-%m-%d %H')
+    with _CREATE_LOCK:
+        html = _create_web_site(hour)
     return html
 
 
 @app.route('/map')
 def get_map():
     """Get the map."""
-    html = 'MAP NOT FOUND!'
-    with open(MAP_FILE, 'r') as infile:
-        html = infile.read()
-    return html
+    return send_file(
+        os.path.abspath(MAP_FILE), mimetype='text/html', conditional=True
+    )
 
 
 @app.route('/table')
 def get_table():
     """Get the table which is identical to the index for now."""
-    html = 'TABLE NOT FOUND!'
-    with open(TABLE_FILE, 'r') as infile:
-        html = infile.read()
-    return html
+    return send_file(
+        os.path.abspath(TABLE_FILE), mimetype='text/html', conditional=True
+    )
 
 
 if __name__ == '__main__':
@@ -1,6 +1,7 @@
 # Copyright (c) 2019, Anders Lervik.
 # Distributed under the MIT License. See LICENSE for more info.
 """Add an extra attribution to a folium map."""
+import textwrap
 from branca.element import Figure, MacroElement
 from jinja2 import Template
 
@@ -8,11 +9,11 @@ from jinja2 import Template
 class Attribution(MacroElement):
     """Add attribution to a Leaflet map."""
 
-    _template = Template("""
+    _template = Template(textwrap.dedent("""
         {% macro script(this,kwargs) %}
         {{this._parent.get_name()}}.attributionControl.addAttribution({{this.attribution}});
         {% endmacro %}
-        """)
+        """), trim_blocks=True, lstrip_blocks=True)
 
     def __init__(self, attribution):
         """Set up the attribution."""
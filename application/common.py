@@ -3,24 +3,34 @@
 """Common method for the package."""
 import errno
 import json
+import logging
 import os
 import pathlib
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 
-FORECAST_DIR = pathlib.Path('forecast')
-OBSERVATION_DIR = pathlib.Path('observations')
-CHART_DIR = pathlib.Path('charts')
-BUILD_DIR = pathlib.Path('build')
+LOGGER = logging.getLogger(__name__)
+
+# Paths are kept as plain strings, these are joined with file names for
+# every place and station and pathlib objects are costly to create:
+FORECAST_DIR = 'forecast'
+OBSERVATION_DIR = 'observations'
+CHART_DIR = 'charts'
+BUILD_DIR = 'build'
 DIRECTORIES = (FORECAST_DIR, OBSERVATION_DIR, CHART_DIR, BUILD_DIR)
 
-OBSERVATION_FILE = '{}-observation-{}.json'
+OBSERVATION_FILE = 'observation-{}.json'
 FORECAST_FILE = 'forecast-{}.json'
 CHART_FILE = 'chart-{}.json'
-STATION_FILE = OBSERVATION_DIR.joinpath('stations-observations.json')
-FROST_SOURCE = OBSERVATION_DIR.joinpath('sources-frost.json')
-MAP_FILE = BUILD_DIR.joinpath('map.html')
-TABLE_FILE = BUILD_DIR.joinpath('table.html')
-UPDATE_FILE = pathlib.Path('last_update.txt')
+STATION_FILE = os.path.join(OBSERVATION_DIR, 'stations-observations.json')
+FROST_SOURCE = os.path.join(OBSERVATION_DIR, 'sources-frost.json')
+FROST_SOURCE_SNAPSHOT = os.path.join(OBSERVATION_DIR, 'sources-frost.npz')
+MAP_FILE = os.path.join(BUILD_DIR, 'map.html')
+TABLE_FILE = os.path.join(BUILD_DIR, 'table.html')
+UPDATE_FILE = 'last_update.txt'
 
 CLIENT_ID = 'insert-frost-client-id-here'
 
@@ -31,15 +41,19 @@ TIME_OUT_FMT = '%Y-%m-%d %H:%M:%S'
 
 def write_text_to_file(text, filename):
     """Write the given text to the given file."""
-    print('Writing file "{}"'.format(filename))
+    LOGGER.debug('Writing file "%s"', filename)
     with open(filename, 'w') as output:
         output.write(text)
 
 
 def read_json_file(filename):
     """Read the given json file."""
-    print('Loading file "{}"'.format(filename))
+    LOGGER.debug('Loading file "%s"', filename)
     data = {}
+    if orjson is not None:
+        with open(filename, 'rb') as json_file:
+            data = orjson.loads(json_file.read())
+        return data
     with open(filename, 'r') as json_file:
         data = json.load(json_file)
     return data
@@ -56,9 +70,18 @@ def write_json_file(json_data, filename, pretty=True):
         The file to write to.
     pretty : boolean, optional
         If True, the output will be slightly more pretty than standard.
+        Note that when orjson is available, the indentation will be
+        two spaces.
 
     """
-    print('Writing file "{}"'.format(filename))
+    LOGGER.debug('Writing file "%s"', filename)
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+        with open(filename, 'wb') as output:
+            output.write(orjson.dumps(json_data, option=option))
+        return
     with open(filename, 'w') as output:
         if pretty:
             json.dump(json_data, output, indent=4, sort_keys=True)
@@ -69,16 +92,16 @@ def write_json_file(json_data, filename, pretty=True):
 def _make_dirs(dirname):
     """Create the given directory."""
     try:
-        print('Creating directory "{}"'.format(dirname))
+        LOGGER.debug('Creating directory "%s"', dirname)
         os.makedirs(dirname)
     except OSError as err:
         if err.errno != errno.EEXIST:
             raise err
         if pathlib.Path(dirname).is_file():
-            print('"{}" is a file. Will not create.'.format(dirname))
+            LOGGER.error('"%s" is a file. Will not create.', dirname)
             raise err
         if pathlib.Path(dirname).is_dir():
-            print('Directory "{}" exists. Will not create.'.format(dirname))
+            LOGGER.debug('Directory "%s" exists. Will not create.', dirname)
 
 
 def set_up_directories():
@@ -1,13 +1,11 @@
 # Copyright (c) 2019, Anders Lervik.
 # Distributed under the MIT License. See LICENSE for more info.
 """Create a website with the folium map and precipitation info."""
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import functools
 import os
 import jinja2
-from normetapi import location_forecast
-from frostapi import get_precipitation_observations
-from read_xml import read_xml_forecast
-from folium_map import create_the_map
 from common import (
     read_json_file,
     write_json_file,
@@ -18,34 +16,44 @@ from common import (
     set_up_directories,
     TIME_OUT_FMT,
     write_text_to_file,
+    BUILD_DIR,
     MAP_FILE,
     TABLE_FILE,
     UPDATE_FILE
 )
 
 
+@functools.lru_cache(maxsize=1)
+def _get_table_template():
+    """Load and compile the table template once."""
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader('templates'),
+        auto_reload=False,
+    )
+    return env.get_template('table.html')
+
+
+def _create_table_row(data):
+    """Create a row in the table from forecast data."""
+    start = data['rain-starts']
+    if start is None:
+        start = ''
+    return {
+        'name': data['name'],
+        'amount': f"{data['amount']:4.2f}",
+        'rain_starts': start,
+        'hours_with_rain': len(data['rain']),
+        'lat': data['lat'],
+        'lon': data['lon'],
+        'url': f"map?lat={data['lat']}&lon={data['lon']}&zoom=14",
+    }
+
+
 def create_table(forecast_files):
     """Gather data for rendering a table."""
-    table_row = []
-    for filei in forecast_files:
-        data = read_json_file(filei)
-        start = data['rain-starts']
-        if start is None:
-            start = ''
-        row = {
-            'name': data['name'],
-            'amount': '{:4.2f}'.format(data['amount']),
-            'rain_starts': start,
-            'hours_with_rain': len(data['rain']),
-            'lat': data['lat'],
-            'lon': data['lon'],
-            'url': '{}?lat={}&lon={}&zoom=14'.format(
-                'map',
-                data['lat'],
-                data['lon'],
-            ),
-        }
-        table_row.append(row)
+    table_row = [
+        _create_table_row(read_json_file(filei)) for filei in forecast_files
+    ]
     headers = (
         'Location',
         'Precipitation (mm)',
@@ -61,9 +69,6 @@ def create_table(forecast_files):
 
 def create_web(forecast_files, now):
     """Render the webpage."""
-    env = jinja2.Environment(
-        loader=jinja2.FileSystemLoader('templates')
-    )
     table = create_table(forecast_files)
     table['caption'] = 'Precipitation next 24 hours (updated: {}).'.format(
         now.strftime(TIME_OUT_FMT)
@@ -73,50 +78,109 @@ def create_web(forecast_files, now):
         'update_time': now.strftime(TIME_OUT_FMT),
         'map_url': 'map',
     }
-    render = env.get_template('table.html').render(data)
+    render = _get_table_template().render(data)
     write_text_to_file(render, TABLE_FILE)
     return render
 
 
+def _is_newer(filename, other):
+    """Check if a file exists and is newer than another file."""
+    return (
+        os.path.isfile(filename) and
+        os.path.getmtime(filename) >= os.path.getmtime(other)
+    )
+
+
+def _need_download(xml_file, now, update):
+    """Check if the forecast in the given file should be downloaded."""
+    if not os.path.isfile(xml_file):
+        return True
+    if not update:
+        return False
+    # Only download forecasts that are more than 1 hour old:
+    return now.timestamp() - os.path.getmtime(xml_file) >= 3600
+
+
 def download_forecasts(places, now, update):
     """Download forecasts for the given places."""
+    # Imported here to keep the import of this module light:
+    from normetapi import location_forecast
+    from read_xml import read_xml_forecast
+    xml_files = [
+        os.path.join(FORECAST_DIR, '{}.xml'.format(place['name']))
+        for place in places
+    ]
+    download = [
+        (place, xml_file) for place, xml_file in zip(places, xml_files)
+        if _need_download(xml_file, now, update)
+    ]
+    # The downloads are mostly waiting for the network, so we do them
+    # in parallel:
+    print('\nDownloading {} forecast(s)'.format(len(download)))
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        forecasts = executor.map(
+            lambda place: location_forecast(place['lat'], place['lon']),
+            [place for place, _ in download]
+        )
+        for (_, xml_file), data in zip(download, forecasts):
+            write_text_to_file(data, xml_file)
+    downloaded = {xml_file for _, xml_file in download}
+
     forecast_files = []
-    for place in places:
+    for place, xml_file in zip(places, xml_files):
         print('\nGetting forecast for "{}"'.format(place['name']))
-        xml_file = FORECAST_DIR.joinpath('{}.xml'.format(place['name']))
-        if update:
-            print('Downloading updated forecast')
-            data = location_forecast(place['lat'], place['lon'])
-            write_text_to_file(data, xml_file)
+        json_forecast = os.path.join(
+            FORECAST_DIR, FORECAST_FILE.format(place['name'])
+        )
+        chart_file = os.path.join(
+            CHART_DIR, CHART_FILE.format(place['name'])
+        )
+        if xml_file in downloaded:
+            print('Using updated forecast')
         else:
             print('Using already downloaded forecast')
+            # The parsed forecast depends on the update time, so it can
+            # only be reused if we are not updating:
+            if (not update and _is_newer(json_forecast, xml_file) and
+                    _is_newer(chart_file, xml_file)):
+                print('Using already parsed forecast')
+                forecast_files.append(json_forecast)
+                continue
         print('Reading xml forecast from "{}"'.format(xml_file))
         precipitation_data, chart = read_xml_forecast(
             xml_file, now, place
         )
-
-        json_forecast = FORECAST_DIR.joinpath(
-            FORECAST_FILE.format(place['name'])
-        )
         write_json_file(
             precipitation_data['meta'], json_forecast, pretty=False
         )
-
-        chart_file = CHART_DIR.joinpath(
-            CHART_FILE.format(place['name'])
-        )
-        write_json_file(chart.to_json(), chart_file, pretty=False)
+        # chart.to_json() is already serialized, so it is written as text
+        # (write_json_file expects an object and would encode it again):
+        write_text_to_file(chart.to_json(), chart_file)
         forecast_files.append(json_forecast)
     return forecast_files
 
 
+# The last parsed update time, stored with the mtime of the update file:
+_LAST_UPDATE_CACHE = {'mtime': None, 'last': None}
+
+
+def _read_last_update():
+    """Read the time of the last update, reusing it if it is unchanged."""
+    mtime = os.stat(UPDATE_FILE).st_mtime_ns
+    if mtime != _LAST_UPDATE_CACHE['mtime']:
+        with open(UPDATE_FILE, 'r') as infile:
+            last = datetime.datetime.strptime(infile.read(), TIME_OUT_FMT)
+        _LAST_UPDATE_CACHE['mtime'] = mtime
+        _LAST_UPDATE_CACHE['last'] = last
+    return _LAST_UPDATE_CACHE['last']
+
+
 def _check_time_for_update():
     """Check if we are to download new forecasts."""
     now = datetime.datetime.now()
     print('Current time: {}'.format(now.strftime(TIME_OUT_FMT)))
-    if UPDATE_FILE.is_file():
-        with open(UPDATE_FILE, 'r') as infile:
-            last = datetime.datetime.strptime(infile.read(), TIME_OUT_FMT)
+    if os.path.isfile(UPDATE_FILE):
+        last = _read_last_update()
         print('Last update: {}'.format(last.strftime(TIME_OUT_FMT)))
         if (now - last).total_seconds() >= 3600:
             # More than 1 hour ago:
@@ -130,6 +194,9 @@ def _check_time_for_update():
 
 def create_web_site(places_file, client_id):
     """Download forecasts and create web-site."""
+    # Imported here to keep the import of this module light:
+    from frostapi import get_precipitation_observations
+    from folium_map import create_the_map
     set_up_directories()
     now, update = _check_time_for_update()
     print('Using update time: {}'.format(now.strftime(TIME_OUT_FMT)))
@@ -137,7 +204,9 @@ def create_web_site(places_file, client_id):
     if update:
         write_text_to_file(now.strftime(TIME_OUT_FMT), UPDATE_FILE)
     # Check if we need to update or not:
-    exist = [i.is_file() for i in (TABLE_FILE, MAP_FILE)]
+    with os.scandir(BUILD_DIR) as entries:
+        built = {entry.name for entry in entries if entry.is_file()}
+    exist = [os.path.basename(i) in built for i in (TABLE_FILE, MAP_FILE)]
     if not update and all(exist):
         print('Update is not triggered and all files exist.')
         print('-> Reusing old files!')
@@ -159,7 +228,7 @@ def create_web_site(places_file, client_id):
     print('=============')
     create_the_map(
         places_file,
-        output=str(MAP_FILE),
+        output=MAP_FILE,
         now=now.strftime(TIME_OUT_FMT)
     )
     print()
@@ -1,6 +1,7 @@
 # Copyright (c) 2019, Anders Lervik.
 # Distributed under the MIT License. See LICENSE for more info.
 """Add a Easy-Button to a folium map."""
+import textwrap
 from branca.element import CssLink, Figure, MacroElement, JavascriptLink
 from jinja2 import Template
 
@@ -20,13 +21,13 @@ CSSURL = (
 class EasyButton(MacroElement):
     """Add a EasyButton to a Leaflet map. This button will just open a url."""
 
-    _template = Template("""
+    _template = Template(textwrap.dedent("""
         {% macro script(this,kwargs) %}
         L.easyButton("{{this.icon}}", function(btn, map){
           window.open("{{this.url}}", "_self");
         }).addTo({{this._parent.get_name()}});
         {% endmacro %}
-        """)
+        """), trim_blocks=True, lstrip_blocks=True)
 
     def __init__(self, icon, url):
         """Set up the button."""
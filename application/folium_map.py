@@ -1,9 +1,12 @@
 # Copyright (c) 2019, Anders Lervik.
 # Distributed under the MIT License. See LICENSE for more info.
 """Create a map using folium."""
+from concurrent.futures import ThreadPoolExecutor
+import os
 import folium
 from attribution import Attribution
 from easybutton import EasyButton
+from urlparamzoom import UrlParamZoom
 from common import (
     read_json_file,
     STATION_FILE,
@@ -45,44 +48,22 @@ TILES = [
     }
 ]
 
+# Arguments for all the tile layers we add to the map. folium.TileLayer
+# objects keep a reference to their parent map so they can not be shared
+# between maps, but the arguments can:
+_TILE_LAYER_ARGS = tuple(
+    ((tile['url'],), {'attr': tile['attr'], 'name': tile['name']})
+    for tile in TILES
+) + (
+    (('openstreetmap',), {}),
+    (('stamenterrain',), {}),
+)
 
-JS_PARAMS = """
-var params = {};
-    window.location.href.replace(/[?&]+([^=&]+)=([^&]*)/gi, function(m, key, value) {
-    params[key] = value;
-});
-"""
-
-
-def monkey_patch_html(the_map):
-    """Modify the html code to parse url parameters."""
-    location = [i for i in the_map.location]
-    the_map.location = ['LOCATION_LAT', 'LOCATION_LON']
-    zoom = the_map.options['zoom']
-    the_map.options['zoom'] = 'THE_ZOOM_LEVEL'
-    root = the_map.get_root()
-    html = root.render()
-    patched = []
-    for lines in html.split('\n'):
-        the_line = lines
-        if lines.find('var map_') != -1 and lines.find('= L.map(') != -1:
-            patched.append(JS_PARAMS)
-        if lines.find('LOCATION_LAT') != -1:
-            the_line = the_line.replace(
-                '"LOCATION_LAT"', 'params.lat || {}'.format(location[0])
-            )
-        if lines.find('LOCATION_LON') != -1:
-            the_line = the_line.replace(
-                '"LOCATION_LON"', 'params.lon || {}'.format(location[1])
-            )
-        if lines.find('THE_ZOOM_LEVEL') != -1:
-            the_line = the_line.replace(
-                '"THE_ZOOM_LEVEL"', 'params.zoom || {}'.format(zoom)
-            )
-        patched.append(the_line)
-    the_map.location = location
-    the_map.options['zoom'] = zoom
-    return '\n'.join(patched)
+# Icons for places, depending on whether it will rain or not:
+_PLACE_ICONS = {
+    True: {'icon': 'cloud', 'color': 'red'},
+    False: {'icon': 'cloud', 'color': 'green'},
+}
 
 
 def create_folium_map():
@@ -100,38 +81,35 @@ def create_folium_map():
         zoom_start=11,
         control_scale = True,
     )
-    for tile in TILES:
-        folium.TileLayer(
-            tile['url'], attr=tile['attr'], name=tile['name']
-        ).add_to(the_map)
-    folium.TileLayer('openstreetmap').add_to(the_map)
-    folium.TileLayer('stamenterrain').add_to(the_map)
+    for args, kwargs in _TILE_LAYER_ARGS:
+        folium.TileLayer(*args, **kwargs).add_to(the_map)
     folium.LayerControl().add_to(the_map)
     return the_map
 
 
 def add_places(the_map, places):
     """Add the given places to the given map."""
+    chart_files = [
+        os.path.join(CHART_DIR, CHART_FILE.format(place['name']))
+        for place in places
+    ]
+    info_files = [
+        os.path.join(FORECAST_DIR, FORECAST_FILE.format(place['name']))
+        for place in places
+    ]
+    # Read the files in parallel since this is mostly waiting for I/O:
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        charts = list(executor.map(read_json_file, chart_files))
+        infos = list(executor.map(read_json_file, info_files))
     markers = []
-    for place in places:
-        chart = read_json_file(
-            CHART_DIR.joinpath(
-                CHART_FILE.format(place['name'])
-            )
-        )
-        info = read_json_file(
-            FORECAST_DIR.joinpath(
-                FORECAST_FILE.format(place['name'])
-            )
-        )
-        color = 'red' if info['will-it-rain'] else 'green'
+    for place, chart, info in zip(places, charts, infos):
         popup = folium.Popup(max_width=500).add_child(
             folium.VegaLite(chart, width=500, height=250),
         )
         marker = folium.Marker(
             location=[place['lat'], place['lon']],
             popup=popup,
-            icon=folium.Icon(icon='cloud', color=color)
+            icon=folium.Icon(**_PLACE_ICONS[info['will-it-rain']])
         )
         marker.add_to(the_map)
         markers.append(marker)
@@ -146,12 +124,10 @@ def load_station_information(filename='stations-observations.json'):
     for station in stations:
         text = [stations[station]['name']]
         text.append('<ul>')
-        for time in sorted(stations[station]['values'], reverse=True):
-            value = stations[station]['values'][time]
-            if value > 0:
-                text.append(rain_fmt.format(time, value))
-            else:
-                text.append(no_rain_fmt.format(time, value))
+        values = sorted(stations[station]['values'].items(), reverse=True)
+        for time, value in values:
+            fmt = rain_fmt if value > 0 else no_rain_fmt
+            text.append(fmt.format(time, value))
         text.append('</ul>Distance:<ul>')
         for distance_to, value in stations[station]['distance'].items():
             text.append(
@@ -191,10 +167,11 @@ def create_the_map(places_file, output=None, now=None):
             Attribution(MET_ATTRIBUTION.format(MET_URL, now))
         )
     the_map.add_child(EasyButton('glyphicon glyphicon-list-alt', '/'))
-    html = monkey_patch_html(the_map)
+    the_map.add_child(
+        UrlParamZoom(the_map.location, the_map.options['zoom'])
+    )
     if output is not None:
-        write_text_to_file(html, output)
-        the_map.save('{}.bak'.format(output))
+        write_text_to_file(the_map.get_root().render(), output)
     return the_map
 
 
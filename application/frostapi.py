@@ -1,12 +1,20 @@
 # Copyright (c) 2019, Anders Lervik.
 # Distributed under the MIT License. See LICENSE for more info.
 """Get precipitation data, using the Frost API."""
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import functools
+import hashlib
+import logging
+import os
 import pathlib
+import threading
 import requests
 import numpy as np
-from numpy.linalg import norm
-import pyproj
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # pragma: no cover
+    cKDTree = None
 from common import (
     read_json_file,
     write_json_file,
@@ -14,16 +22,155 @@ from common import (
     OBSERVATION_DIR,
     STATION_FILE,
     FROST_SOURCE,
+    FROST_SOURCE_SNAPSHOT,
     set_up_directories,
     CLIENT_ID,
 )
 
 
+LOGGER = logging.getLogger(__name__)
+
 TARGET_RESOLUTION = 'P1D'
 PREFERRED_OFFSET = 'PT6H'
+MAX_WORKERS = 16
+SOURCE_KEYS = ('ids', 'names', 'lon', 'lat', 'masl', 'pos')
+
+EARTH_RADIUS = 6371000.0
+
+# Locks for observation files, so that the same observations are not
+# downloaded by several threads at the same time. A file uses the lock
+# given by the hash of its name, so the number of locks stays fixed:
+_OBSERVATION_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+# Sources read from FROST_SOURCE and the data we extract from them, stored
+# with the modification time of the file:
+_SOURCE_CACHE = {'mtime': None, 'sources': None, 'data': None}
+
+
+def _to_cartesian(lon, lat, masl):
+    """Convert positions on the earth to cartesian coordinates.
 
-ECEF = pyproj.Proj(proj='geocent', ellps='WGS84', datum='WGS84')
-LLA = pyproj.Proj(proj='latlong', ellps='WGS84', datum='WGS84')
+    The earth is approximated by a sphere, which keeps the ordering of
+    distances we need for finding the closest stations.
+
+    Parameters
+    ----------
+    lon : float or numpy.array
+        The longitude(s), in degrees.
+    lat : float or numpy.array
+        The latitude(s), in degrees.
+    masl : float or numpy.array
+        The altitude(s), in meters above sea level.
+
+    Returns
+    -------
+    out : numpy.array
+        The cartesian coordinates, one row per position.
+
+    """
+    lon = np.deg2rad(lon)
+    lat = np.deg2rad(lat)
+    radius = EARTH_RADIUS + np.asarray(masl, dtype=np.float64)
+    cos_lat = np.cos(lat)
+    return np.column_stack(
+        (
+            radius * cos_lat * np.cos(lon),
+            radius * cos_lat * np.sin(lon),
+            radius * np.sin(lat),
+        )
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_closest_kernel():
+    """Get a kernel for finding the N closest sources, compiled with numba.
+
+    numba is imported here rather than with the module, so its start-up
+    cost is only paid when the kernel is needed.
+
+    Returns
+    -------
+    out : callable or None
+        The compiled kernel, or None if numba is not installed.
+
+    """
+    try:
+        import numba
+    except ImportError:  # pragma: no cover
+        return None
+    prange = numba.prange
+
+    @numba.njit(parallel=True, cache=True, fastmath=True)
+    def _closest_kernel(pos_sources, pos, number):
+        """Find the N closest sources for each position.
+
+        This keeps the N smallest squared distances for each position in
+        a sorted buffer, instead of sorting all the distances.
+
+        Parameters
+        ----------
+        pos_sources : numpy.array
+            The positions of all stations we are considering.
+        pos : numpy.array
+            The positions to find the closest stations for.
+        number : int
+            The number of closest sources to obtain.
+
+        Returns
+        -------
+        idx : numpy.array of integers
+            The indices for the N closest stations, one row per position.
+        dist2 : numpy.array
+            The squared distances for the N closest stations.
+
+        """
+        npos = pos.shape[0]
+        idx = np.zeros((npos, number), dtype=np.int64)
+        dist2 = np.full((npos, number), np.inf)
+        for i in prange(npos):
+            for j in range(pos_sources.shape[0]):
+                dist2_j = 0.0
+                for d in range(3):
+                    diff = pos_sources[j, d] - pos[i, d]
+                    dist2_j += diff * diff
+                if dist2_j >= dist2[i, number - 1]:
+                    continue
+                # Insert into the sorted buffer:
+                k = number - 1
+                while k > 0 and dist2[i, k - 1] > dist2_j:
+                    dist2[i, k] = dist2[i, k - 1]
+                    idx[i, k] = idx[i, k - 1]
+                    k -= 1
+                dist2[i, k] = dist2_j
+                idx[i, k] = j
+        return idx, dist2
+
+    return _closest_kernel
+
+
+@functools.lru_cache(maxsize=None)
+def _get_session(client_id):
+    """Get a session for requests to Frost.
+
+    The session is shared by all requests with the same client id, so
+    that connections to Frost are kept alive and reused.
+
+    Parameters
+    ----------
+    client_id : string
+        The client id to use for the requests.
+
+    Returns
+    -------
+    session : object like requests.Session
+        The session to use for requests.
+
+    """
+    session = requests.Session()
+    session.auth = (client_id, '')
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS)
+    session.mount('https://', adapter)
+    return session
 
 
 def _check_response(response):
@@ -41,12 +188,15 @@ def _check_response(response):
 
     """
     if response.status_code == 200:
-        print('Frost return status: {}'.format(response.status_code))
+        LOGGER.debug('Frost return status: %s', response.status_code)
         return True
-    ret = response.json()
-    print('Could not get Frost data: {}'.format(response.status_code))
-    print('Message: {}'.format(ret['error']['message']))
-    print('Reason: {}'.format(ret['error']['reason']))
+    LOGGER.error('Could not get Frost data: %s', response.status_code)
+    try:
+        ret = response.json()
+        LOGGER.error('Message: %s', ret['error']['message'])
+        LOGGER.error('Reason: %s', ret['error']['reason'])
+    except (ValueError, KeyError, TypeError):
+        LOGGER.error('Response: %s', response.text)
     return False
 
 
@@ -68,17 +218,106 @@ def get_frost_sources(client_id):
     if not pathlib.Path(FROST_SOURCE).is_file():
         print('Source "{}" not found --- downloading!'.format(FROST_SOURCE))
         url = 'https://frost.met.no/sources/v0.jsonld'
-        response = requests.get(url, {}, auth=(client_id, ''))
+        response = _get_session(client_id).get(url)
         if _check_response(response):
             sources = response.json()['data']
             print('Storing sources.')
             write_json_file(sources, FROST_SOURCE)
+            _SOURCE_CACHE['mtime'] = os.path.getmtime(FROST_SOURCE)
+            _SOURCE_CACHE['sources'] = sources
+            _SOURCE_CACHE['data'] = None
     else:
-        print('Reading sources from file "{}".'.format(FROST_SOURCE))
-        sources = read_json_file(FROST_SOURCE)
+        mtime = os.path.getmtime(FROST_SOURCE)
+        if (mtime != _SOURCE_CACHE['mtime'] or
+                _SOURCE_CACHE['sources'] is None):
+            print('Reading sources from file "{}".'.format(FROST_SOURCE))
+            _SOURCE_CACHE['mtime'] = mtime
+            _SOURCE_CACHE['sources'] = read_json_file(FROST_SOURCE)
+            _SOURCE_CACHE['data'] = None
+        sources = _SOURCE_CACHE['sources']
     return sources
 
 
+def _save_source_snapshot(data, mtime):
+    """Store the extracted source information in a numpy file.
+
+    Parameters
+    ----------
+    data : dict of numpy.arrays
+        The source information, as returned by :py:func:`get_source_data`.
+    mtime : float
+        The modification time of the file with the sources the
+        information was extracted from.
+
+    """
+    print('Storing source snapshot "{}".'.format(FROST_SOURCE_SNAPSHOT))
+    np.savez(FROST_SOURCE_SNAPSHOT, mtime=mtime, **data)
+
+
+def _load_source_snapshot(mtime):
+    """Load the extracted source information from a numpy file.
+
+    Parameters
+    ----------
+    mtime : float
+        The modification time of the file with the sources. The
+        snapshot is only used if it was created from this file.
+
+    Returns
+    -------
+    out : dict of numpy.arrays or None
+        The source information, as returned by :py:func:`get_source_data`,
+        or None if no valid snapshot was found.
+
+    """
+    if not os.path.isfile(FROST_SOURCE_SNAPSHOT):
+        return None
+    with np.load(FROST_SOURCE_SNAPSHOT) as snapshot:
+        if snapshot['mtime'] != mtime:
+            return None
+        if not all(key in snapshot for key in SOURCE_KEYS):
+            return None
+        print('Reading source snapshot "{}".'.format(FROST_SOURCE_SNAPSHOT))
+        return {key: snapshot[key] for key in SOURCE_KEYS}
+
+
+def get_frost_source_data(client_id):
+    """Get the information we need about the sources from Frost.
+
+    The extracted information is reused for as long as the file with
+    the sources is unchanged, either from memory or from a snapshot
+    stored next to the sources.
+
+    Parameters
+    ----------
+    client_id : string
+        The client id to use for the request.
+
+    Returns
+    -------
+    out : dict of numpy.arrays
+        The source information, as returned by :py:func:`get_source_data`.
+
+    """
+    if os.path.isfile(FROST_SOURCE):
+        mtime = os.path.getmtime(FROST_SOURCE)
+        if (mtime == _SOURCE_CACHE['mtime'] and
+                _SOURCE_CACHE['data'] is not None):
+            return _SOURCE_CACHE['data']
+        data = _load_source_snapshot(mtime)
+        if data is not None:
+            _SOURCE_CACHE['mtime'] = mtime
+            _SOURCE_CACHE['sources'] = None
+            _SOURCE_CACHE['data'] = data
+            return data
+    sources = get_frost_sources(client_id)
+    if sources is not _SOURCE_CACHE['sources']:
+        return get_source_data(sources)
+    _SOURCE_CACHE['data'] = get_source_data(sources)
+    _save_source_snapshot(_SOURCE_CACHE['data'], _SOURCE_CACHE['mtime'])
+    return _SOURCE_CACHE['data']
+
+
 def get_frost_observation(client_id, sources, reference_time):
     """Download precipitation observation from Frost.
 
@@ -103,7 +342,7 @@ def get_frost_observation(client_id, sources, reference_time):
         'elements': 'sum(precipitation_amount {})'.format(TARGET_RESOLUTION),
         'referencetime': reference_time,
     }
-    response = requests.get(url, parameters, auth=(client_id, ''))
+    response = _get_session(client_id).get(url, params=parameters)
     if _check_response(response):
         data = response.json()['data']
         return data
@@ -120,47 +359,41 @@ def get_source_data(sources):
 
     Returns
     -------
-    source_id : list of dicts
-        The extracted source information, represented as a dict.
-    coordinates : numpy.array
-        The locations (lon, lat) for the different sources.
-    pos_sources : numpy.array
-        The position of the sources in ECEF coordinates.
+    out : dict of numpy.arrays
+        The extracted source information, with one array for each of the
+        keys in ``SOURCE_KEYS``: the source ids (``ids``), the names
+        (``names``), the locations (``lon``, ``lat`` and ``masl``) and
+        the positions in cartesian coordinates (``pos``). Row i in all the
+        arrays refers to the same source.
 
     """
-    coordinates = []
-    source_id = []
-    for source in sources:
-        # Pick out the data we need from the source:
-        if 'geometry' not in source:
-            continue
-        lon = float(source['geometry']['coordinates'][0])
-        lat = float(source['geometry']['coordinates'][1])
-        if 'masl' in source:
-            masl = float(source['masl'])
-        else:
-            masl = 0
-        source_id.append(
-            {
-                'id': source['id'],
-                'name': source['name'],
-                'lon': lon,
-                'lat': lat,
-                'masl': masl,
-            }
-        )
-        coordinates.append([lon, lat, masl])
-    coordinates = np.array(coordinates)
-
-    xpos, ypos, zpos = pyproj.transform(
-        LLA,
-        ECEF,
-        coordinates[:, 0],
-        coordinates[:, 1],
-        coordinates[:, 2],
+    # Pick out the sources with a location:
+    sources = [source for source in sources if 'geometry' in source]
+    count = len(sources)
+    lon = np.fromiter(
+        (source['geometry']['coordinates'][0] for source in sources),
+        dtype=np.float64,
+        count=count,
+    )
+    lat = np.fromiter(
+        (source['geometry']['coordinates'][1] for source in sources),
+        dtype=np.float64,
+        count=count,
+    )
+    masl = np.fromiter(
+        (source.get('masl', 0) for source in sources),
+        dtype=np.float64,
+        count=count,
     )
-    pos_sources = np.column_stack((xpos, ypos, zpos))
-    return source_id, coordinates, pos_sources
+    return {
+        'ids': np.array([source['id'] for source in sources], dtype=str),
+        'names': np.array([source['name'] for source in sources], dtype=str),
+        'lon': lon,
+        'lat': lat,
+        'masl': masl,
+        # Single precision is plenty for ranking stations on distance:
+        'pos': _to_cartesian(lon, lat, masl).astype(np.float32),
+    }
 
 
 def get_closest_sources(point, pos_sources, number=3):
@@ -183,14 +416,66 @@ def get_closest_sources(point, pos_sources, number=3):
         The distances for the N closest stations
 
     """
-    xpos, ypos, zpos = pyproj.transform(
-        LLA, ECEF, point['lon'], point['lat'], point.get('masl', 0.0),
-    )
-    pos = np.array([xpos, ypos, zpos])
+    pos = _to_cartesian(
+        point['lon'], point['lat'], point.get('masl', 0.0)
+    )[0]
     dist_vec = pos_sources - pos
-    dist = norm(dist_vec, axis=-1)
-    idx = np.argsort(dist)[:number]
-    return idx, dist[idx]
+    dist2 = np.einsum('ij,ij->i', dist_vec, dist_vec)
+    if number < len(dist2):
+        # Only sort the N closest:
+        part = np.argpartition(dist2, number)[:number]
+    else:
+        part = np.arange(len(dist2))
+    idx = part[np.argsort(dist2[part])]
+    return idx, np.sqrt(dist2[idx])
+
+
+def query_closest_sources(points, pos_sources, number=3):
+    """Get the N closest sources to each of the given positions.
+
+    Parameters
+    ----------
+    points : list of dicts
+        The points (lon, lat, altitude) we are considering.
+    pos_sources : numpy.array
+        The positions of all stations we are considering.
+    number : int
+        The number of closest sources to obtain.
+
+    Returns
+    -------
+    out[0] : numpy.array of integers
+        The indices for the N closest stations, one row per point.
+    out[1] : numpy.array
+        The distances for the N closest stations, one row per point.
+
+    """
+    # numba is only used (and imported) when scipy is not available:
+    kernel = _get_closest_kernel() if cKDTree is None else None
+    if cKDTree is None and kernel is None:
+        closest = [
+            get_closest_sources(point, pos_sources, number=number)
+            for point in points
+        ]
+        return (
+            np.array([idx for idx, _ in closest]),
+            np.array([dist for _, dist in closest]),
+        )
+    number = min(number, len(pos_sources))
+    pos = _to_cartesian(
+        [point['lon'] for point in points],
+        [point['lat'] for point in points],
+        [point.get('masl', 0.0) for point in points],
+    ).astype(pos_sources.dtype)
+    if cKDTree is None:
+        idx, dist2 = kernel(pos_sources, pos, number)
+        return idx, np.sqrt(dist2)
+    tree = cKDTree(pos_sources)
+    dist, idx = tree.query(pos, k=number, workers=-1)
+    return (
+        np.reshape(idx, (len(points), number)),
+        np.reshape(dist, (len(points), number)),
+    )
 
 
 def find_closest_stations(places_file, client_id, number=3):
@@ -216,20 +501,21 @@ def find_closest_stations(places_file, client_id, number=3):
     print('\nGetting places.')
     places = read_json_file(places_file)
     print('\nGetting stations.')
-    sources = get_frost_sources(client_id)
-    stations, _, pos_sources = get_source_data(sources)
+    sources = get_frost_source_data(client_id)
 
-    for place in places:
-        idx, dist = get_closest_sources(place, pos_sources, number=number)
+    all_idx, all_dist = query_closest_sources(
+        places, sources['pos'], number=number
+    )
+    for place, idx, dist in zip(places, all_idx, all_dist):
         place['stations'] = []
         for i, disti in zip(idx, dist):
             place['stations'].append(
                 {
-                    'id': stations[i]['id'],
-                    'name': stations[i]['name'],
-                    'lon': stations[i]['lon'],
-                    'lat': stations[i]['lat'],
-                    'distance': disti,
+                    'id': str(sources['ids'][i]),
+                    'name': str(sources['names'][i]),
+                    'lon': float(sources['lon'][i]),
+                    'lat': float(sources['lat'][i]),
+                    'distance': float(disti),
                 }
             )
         print('\nStations found for: "{}"'.format(place['name']))
@@ -237,27 +523,55 @@ def find_closest_stations(places_file, client_id, number=3):
             print('  * {id} - "{name}": {distance}'.format(**station))
     print('\nStoring places & stations.')
     write_json_file(places, places_file)
+    # Add lookups used when getting observations. These are added after
+    # storing the places since they are derived from the stations:
+    for place in places:
+        place['_sources_csv'] = ','.join(
+            station['id'] for station in place['stations']
+        )
+        place['_station_index'] = {
+            station['id']: station for station in place['stations']
+        }
     return places
 
 
 def extract_observations(raw_data):
-    """Extract observation data from the given json raw data."""
+    """Extract observation data from the given json raw data.
+
+    Parameters
+    ----------
+    raw_data : list of dicts
+        The json representation of the observation(s).
+
+    Returns
+    -------
+    observations : dict of dicts
+        The extracted observations for each station, grouped on the
+        date (YYYY-MM-DD) of the reference time.
+
+    """
     observations = {}
     for item in raw_data:
-        source, idx = item['sourceId'].split(':')
-        if int(idx) != 0:
+        source_id = item['sourceId']
+        # Only consider the default sensor:
+        if not source_id.endswith(':0'):
             continue
-        observations[source] = {
-            'offset': [],
-            'value': [],
+        selected = [
+            i for i in item['observations']
+            if i['timeResolution'] == TARGET_RESOLUTION and
+            'precipitation' in i['elementId']
+        ]
+        offsets = [i['timeOffset'] for i in selected]
+        # Index of the first observation for each offset:
+        offset_index = {}
+        for idx, offset in enumerate(offsets):
+            offset_index.setdefault(offset, idx)
+        date = item['referenceTime'][:10]
+        observations.setdefault(date, {})[source_id[:-2]] = {
+            'offset': offsets,
+            'offset_index': offset_index,
+            'value': [i['value'] for i in selected],
         }
-        for i in item['observations']:
-            if i['timeResolution'] != TARGET_RESOLUTION:
-                continue
-            if 'precipitation' not in i['elementId']:
-                continue
-            observations[source]['offset'].append(i['timeOffset'])
-            observations[source]['value'].append(i['value'])
     return observations
 
 
@@ -280,15 +594,36 @@ def find_closest_valid(observations, stations, number=3):
         observations.
 
     """
-    closest = []
-    for station in stations:
-        if station['id'] not in observations:
-            continue
-        if observations[station['id']]['value']:
-            closest.append(station['id'])
-        if len(closest) >= number:
-            break
-    return closest
+    valid = {key for key, value in observations.items() if value['value']}
+    closest = [
+        station['id'] for station in stations if station['id'] in valid
+    ]
+    return closest[:number]
+
+
+def get_observation_file(sources, reference_time):
+    """Get the name of the file to store observations in.
+
+    The name is derived from the requested sources and reference time,
+    so that places sharing the same stations also share observations.
+
+    Parameters
+    ----------
+    sources : string
+        The stations to download observations for.
+    reference_time : string
+        The target time to get observations for.
+
+    Returns
+    -------
+    out : string
+        The path to the file to store the observations in.
+
+    """
+    digest = hashlib.blake2b(
+        '{}|{}'.format(sources, reference_time).encode(), digest_size=12
+    ).hexdigest()
+    return os.path.join(OBSERVATION_DIR, OBSERVATION_FILE.format(digest))
 
 
 def get_raw_observation_data(observation_file, client_id, sources,
@@ -314,58 +649,103 @@ def get_raw_observation_data(observation_file, client_id, sources,
         The json representation of the observation(s).
 
     """
-    if not pathlib.Path(observation_file).is_file():
-        print('Getting observation(s) from Frost.')
-        raw_data = get_frost_observation(
-            client_id, sources, reference_time
-        )
-        write_json_file(raw_data, observation_file)
-    else:
-        print('Using local observation file.')
-        raw_data = read_json_file(observation_file)
+    lock = _OBSERVATION_LOCKS[
+        hash(observation_file) % len(_OBSERVATION_LOCKS)
+    ]
+    with lock:
+        if not pathlib.Path(observation_file).is_file():
+            print('Getting observation(s) from Frost.')
+            raw_data = get_frost_observation(
+                client_id, sources, reference_time
+            )
+            write_json_file(raw_data, observation_file)
+        else:
+            print('Using local observation file.')
+            raw_data = read_json_file(observation_file)
     return raw_data
 
 
+@functools.lru_cache(maxsize=512)
+def _get_observations(client_id, sources, reference_time):
+    """Get and extract observations from Frost.
+
+    The extracted observations are kept in memory, so places with the
+    same stations will reuse them.
+
+    Parameters
+    ----------
+    client_id : string
+        The client id to use for a request to Frost.
+    sources : string
+        The stations to get observations for.
+    reference_time : string
+        The target time to get observations for.
+
+    Returns
+    -------
+    out : dict of dicts
+        The extracted observations, as returned by
+        :py:func:`extract_observations`.
+
+    """
+    raw_data = get_raw_observation_data(
+        get_observation_file(sources, reference_time),
+        client_id,
+        sources,
+        reference_time,
+    )
+    return extract_observations(raw_data)
+
+
 def get_precipitation_data_time(place, now, days, client_id):
     """Get precipitation data for a given number of days ago.
 
+    The observations for all the days are obtained with a single
+    request to Frost.
+
     Parameters
     ----------
     place : dict
-        The place we are getting observations for.
+        The place we are getting observations for, as returned by
+        :py:func:`find_closest_stations`.
     now : object like datetime.datetime
         The current time.
-    days : int
+    days : tuple of ints
         The number of days ago we will get observation data for.
     client_id : string
         The client id to use for a request to Frost.
 
     Returns
     -------
-    ref_time : string
-        The reference time we are getting data for.
-    data : list of dicts
-        The precipitation data we got observations for.
+    ref_times : list of strings
+        The reference times we are getting data for, one for each
+        of the given days.
+    data : list of lists of dicts
+        The precipitation data we got observations for, one list for
+        each of the given days.
 
     """
-    stations = {station['id']: station for station in place['stations']}
-    sources = ','.join([station['id'] for station in place['stations']])
-
-    ref_time = datetime.datetime.strftime(
-        now - datetime.timedelta(days=days), '%Y-%m-%d'
+    stations = place['_station_index']
+    sources = place['_sources_csv']
+
+    dates = [(now - datetime.timedelta(days=day)).date() for day in days]
+    ref_times = [date.strftime('%Y-%m-%d') for date in dates]
+    # The end of the interval is not included:
+    start = min(dates)
+    end = max(dates) + datetime.timedelta(days=1)
+    observations = _get_observations(
+        client_id, sources, '{}/{}'.format(start, end)
     )
-    raw_data = get_raw_observation_data(
-        OBSERVATION_DIR.joinpath(
-            OBSERVATION_FILE.format(place['name'], ref_time)
-        ),
-        client_id,
-        sources,
-        ref_time
-    )
-    observations = extract_observations(raw_data)
-    closest = find_closest_valid(observations, place['stations'], number=3)
-    data = extract_precipitation_data(observations, closest, stations)
-    return ref_time, data
+    data = []
+    for ref_time in ref_times:
+        observations_time = observations.get(ref_time, {})
+        closest = find_closest_valid(
+            observations_time, place['stations'], number=3
+        )
+        data.append(
+            extract_precipitation_data(observations_time, closest, stations)
+        )
+    return ref_times, data
 
 
 def get_precipitation_observations(places_json_file, client_id, now,
@@ -390,24 +770,27 @@ def get_precipitation_observations(places_json_file, client_id, now,
 
     """
     places = find_closest_stations(places_json_file, client_id, number=number)
-    all_place_data = []
-    for place in places:
-        print('\nGetting observations for: "{}"'.format(place['name']))
-        place_data = {
-            'name': place['name'],
-            'observations': [],
-            'reference_time': [],
-        }
-        for days in (1, 2, 3):
-            reference_time, precipitation_data = get_precipitation_data_time(
-                place,
-                now,
-                days,
-                client_id,
+    # The requests to Frost are mostly waiting for the network, so we
+    # do them in parallel:
+    print('\nGetting observations for {} place(s).'.format(len(places)))
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(
+            executor.map(
+                lambda place: get_precipitation_data_time(
+                    place, now, (1, 2, 3), client_id
+                ),
+                places,
             )
-            place_data['observations'].append(precipitation_data)
-            place_data['reference_time'].append(reference_time)
-        all_place_data.append(place_data)
+        )
+    all_place_data = []
+    for place, (reference_time, precipitation_data) in zip(places, results):
+        all_place_data.append(
+            {
+                'name': place['name'],
+                'observations': precipitation_data,
+                'reference_time': reference_time,
+            }
+        )
     group_data_on_stations(all_place_data, STATION_FILE)
 
 
@@ -432,13 +815,8 @@ def extract_precipitation_data(observations, closest, stations):
     """
     precipitation_data = []
     for station in closest:
-        offsets = observations[station]['offset']
-        if PREFERRED_OFFSET not in offsets:
-            idx = 0
-            offset = offsets[idx]
-        else:
-            idx = offsets.index(PREFERRED_OFFSET)
-            offset = offsets[idx]
+        idx = observations[station]['offset_index'].get(PREFERRED_OFFSET, 0)
+        offset = observations[station]['offset'][idx]
         value = observations[station]['value'][idx]
         precipitation_data.append(
             {
@@ -469,13 +847,13 @@ def group_data_on_stations(place_data, outfile=None):
     stations = {}
     for data in place_data:
         name = data['name']
-        for i, ref_time in enumerate(data['reference_time']):
-            observations = data['observations'][i]
+        for ref_time, observations in zip(data['reference_time'],
+                                          data['observations']):
             for observation in observations:
                 station_data = observation['station']
-                station_id = station_data['id']
-                if station_id not in stations:
-                    stations[station_id] = {
+                station = stations.get(station_data['id'])
+                if station is None:
+                    station = {
                         'name': station_data['name'],
                         'lat': station_data['lat'],
                         'lon': station_data['lon'],
@@ -483,13 +861,10 @@ def group_data_on_stations(place_data, outfile=None):
                         'distance': {},
                         'offsets': {}
                     }
-                station = stations[station_id]
-                if name not in station['distance']:
-                    station['distance'][name] = station_data['distance']
-                if ref_time not in station['values']:
-                    station['values'][ref_time] = observation['value']
-                if ref_time not in station['offsets']:
-                    station['offsets'][ref_time] = observation['offset']
+                    stations[station_data['id']] = station
+                station['distance'].setdefault(name, station_data['distance'])
+                station['values'].setdefault(ref_time, observation['value'])
+                station['offsets'].setdefault(ref_time, observation['offset'])
     if outfile is not None:
         print('\nStoring observations for stations.')
         write_json_file(stations, outfile)
@@ -499,6 +874,7 @@ def group_data_on_stations(place_data, outfile=None):
 def main(client_id):
     """Download precipitation data."""
     set_up_directories()
+    _get_observations.cache_clear()
     now = datetime.datetime(2019, 9, 4, 12, 22, 59, 855905)
     get_precipitation_observations('places.json', client_id, now, number=15)
 
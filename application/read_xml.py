@@ -1,28 +1,153 @@
 # Copyright (c) 2019, Anders Lervik.
 # Distributed under the MIT License. See LICENSE for more info.
 """Parse and interpret some XML data from the MET Norway Weather API."""
+import bisect
 import datetime
-import json
+import functools
+import io
+import itertools
+from operator import itemgetter
+import os
+import re
 from lxml import etree
 import numpy as np
-from matplotlib import pyplot as plt
-from matplotlib.cm import get_cmap
-from matplotlib.gridspec import GridSpec
-import altair as alt
 import pandas as pd
-from common import TIME_FMT, TIME_OUT_FMT
-
-plt.style.use('seaborn-talk')
+from common import read_json_file, TIME_FMT, TIME_OUT_FMT
 
 
 DEBUG = False
 
+# The times in the forecasts are in UTC, and we use this (naive) epoch
+# for converting them to seconds:
+_EPOCH = datetime.datetime(1970, 1, 1)
+_SECOND = datetime.timedelta(seconds=1)
+
+# Get the time information of a point:
+_GET_TIME = itemgetter('time')
+
+# Can times be formatted as TIME_OUT_FMT with isoformat?
+_ISO_TIME_OUT = TIME_OUT_FMT == '%Y-%m-%d %H:%M:%S'
+
 
+@functools.lru_cache(maxsize=4096)
 def _parse_time_string(time_str):
     """Parse a string into a date time object."""
+    # The times are fixed width (TIME_FMT), so we can slice out the
+    # numbers directly. The same times occur many times in a forecast,
+    # which is why the results are cached.
+    if len(time_str) == 20 and time_str[19] == 'Z':
+        return datetime.datetime(
+            int(time_str[0:4]),
+            int(time_str[5:7]),
+            int(time_str[8:10]),
+            int(time_str[11:13]),
+            int(time_str[14:16]),
+            int(time_str[17:19]),
+        )
     return datetime.datetime.strptime(time_str, TIME_FMT)
 
 
+@functools.lru_cache(maxsize=4096)
+def _unix_seconds(time):
+    """Get the seconds since the epoch for a (UTC) date time object."""
+    return (time - _EPOCH) // _SECOND
+
+
+# How to parse the attributes of the different tags:
+PARSERS = {
+    'location': {
+        'altitude': float,
+        'latitude': float,
+        'longitude': float,
+    },
+    'temperature': {
+        'value': float,
+    },
+    'windDirection': {
+        'deg': float,
+    },
+    'windSpeed': {
+        'mps': float,
+        'beaufort': int,
+    },
+    'humidity': {
+        'value': float,
+    },
+    'pressure': {
+        'value': float,
+    },
+    'cloudiness': {
+        'percent': float,
+    },
+    'lowClouds': {
+        'percent': float,
+    },
+    'mediumClouds': {
+        'percent': float,
+    },
+    'highClouds': {
+        'percent': float,
+    },
+    'temperatureProbability': {
+        'value': int,
+    },
+    'windProbability': {
+        'value': int,
+    },
+    'dewpointTemperature': {
+        'value': float,
+    },
+    'precipitation': {
+        'value': float,
+        'minvalue': float,
+        'maxvalue': float,
+    },
+    'minTemperature': {
+        'value': float,
+    },
+    'maxTemperature': {
+        'value': float,
+    },
+    'symbol': {
+        'number': int,
+    },
+    'symbolProbability': {
+        'value': int,
+    },
+    'time': {
+        'from': _parse_time_string,
+        'to': _parse_time_string,
+    },
+    'model': {
+        'termin': _parse_time_string,
+        'runended': _parse_time_string,
+        'nextrun': _parse_time_string,
+        'from': _parse_time_string,
+        'to': _parse_time_string,
+    },
+}
+
+# The parsers flattened on (tag, attribute) for a single lookup:
+_PARSERS = {
+    (tag, attribute): parser
+    for tag, parsers in PARSERS.items()
+    for attribute, parser in parsers.items()
+}
+
+
+# Regular expressions for the fixed layout of the MET Norway xml, used
+# by _fast_parse_xml:
+_META_RE = re.compile(r'<meta\b[^>]*>(.*?)</meta>', re.S)
+# Start and end tags as (slash for end tags, tag, attributes):
+_TAG_RE = re.compile(r'<(/?)([A-Za-z_][\w.-]*)([^>]*)>')
+_ATTR_RE = re.compile(r'([^\s=]+)\s*=\s*"([^"]*)"')
+# numpy types for parsing many numeric attributes at once:
+_BULK_TYPES = {float: np.float64, int: np.int64}
+# Things the regular expressions do not handle (entities, comments,
+# CDATA, single quoted attributes and default namespaces):
+_NOT_FAST = ('&', '<!', "='", 'xmlns=')
+
+
 def parse_tag_attribute(tag, attribute, raw_value):
     """Parse an attribute of a given tag.
 
@@ -41,80 +166,7 @@ def parse_tag_attribute(tag, attribute, raw_value):
         The parsed value.
 
     """
-    parsers = {
-        'location': {
-            'altitude': float,
-            'latitude': float,
-            'longitude': float,
-        },
-        'temperature': {
-            'value': float,
-        },
-        'windDirection': {
-            'deg': float,
-        },
-        'windSpeed': {
-            'mps': float,
-            'beaufort': int,
-        },
-        'humidity': {
-            'value': float,
-        },
-        'pressure': {
-            'value': float,
-        },
-        'cloudiness': {
-            'percent': float,
-        },
-        'lowClouds': {
-            'percent': float,
-        },
-        'mediumClouds': {
-            'percent': float,
-        },
-        'highClouds': {
-            'percent': float,
-        },
-        'temperatureProbability': {
-            'value': int,
-        },
-        'windProbability': {
-            'value': int,
-        },
-        'dewpointTemperature': {
-            'value': float,
-        },
-        'precipitation': {
-            'value': float,
-            'minvalue': float,
-            'maxvalue': float,
-        },
-        'minTemperature': {
-            'value': float,
-        },
-        'maxTemperature': {
-            'value': float,
-        },
-        'symbol': {
-            'number': int,
-        },
-        'symbolProbability': {
-            'value': int,
-        },
-        'time': {
-            'from': _parse_time_string,
-            'to': _parse_time_string,
-        },
-        'model': {
-            'termin': _parse_time_string,
-            'runended': _parse_time_string,
-            'nextrun': _parse_time_string,
-            'from': _parse_time_string,
-            'to': _parse_time_string,
-        },
-    }
-    parser = parsers.get(tag, {}).get(attribute, str)
-    return parser(raw_value)
+    return _PARSERS.get((tag, attribute), str)(raw_value)
 
 
 def get_attributes(node):
@@ -131,20 +183,110 @@ def get_attributes(node):
         The read attributes.
 
     """
-    attribs = {}
-    for attr in node.attrib:
-        attribs[attr] = parse_tag_attribute(node.tag, attr, node.attrib[attr])
-    return attribs
+    return _parse_attributes(node.tag, node.attrib.items())
 
 
-def parse_xml(raw_xml):
-    """Parse the given xml data.
+def _parse_attributes(tag, items):
+    """Parse (attribute, raw value) pairs for the given tag."""
+    get_parser = _PARSERS.get
+    return {
+        attr: get_parser((tag, attr), str)(value) for attr, value in items
+    }
+
+
+def _parse_attribute_columns(nodes):
+    """Parse the attributes of nodes in place, one attribute at a time.
+
+    Parameters
+    ----------
+    nodes : dict of lists of dicts
+        The raw attributes (strings) of nodes, grouped by their tag.
+
+    """
+    for tag, attribs in nodes.items():
+        for attr, parser in PARSERS.get(tag, {}).items():
+            have = [i for i in attribs if attr in i]
+            if not have:
+                continue
+            raw = [i[attr] for i in have]
+            if parser in _BULK_TYPES:
+                # Convert all the numbers in one go with numpy:
+                values = np.array(raw, dtype=_BULK_TYPES[parser]).tolist()
+            else:
+                values = [parser(i) for i in raw]
+            for attribs_i, value in zip(have, values):
+                attribs_i[attr] = value
+
+
+def _fast_parse_xml(raw_xml):
+    """Parse the given xml data with regular expressions.
+
+    This only handles the fixed layout of the MET Norway data.
 
     Parameters
     ----------
     raw_xml : string
         The raw xml data we are going to read.
 
+    Returns
+    -------
+    out : tuple of lists of dicts or None
+        The models and the forecast points, as returned by
+        :py:func:`.parse_xml`, or None if the data could not be parsed
+        here.
+
+    """
+    if any(i in raw_xml for i in _NOT_FAST):
+        return None
+    meta = _META_RE.search(raw_xml)
+    product = raw_xml.find('<product')
+    if meta is None or product < 0 or '</weatherdata>' not in raw_xml:
+        return None
+    models = [
+        _parse_attributes(tag, _ATTR_RE.findall(attrs))
+        for end, tag, attrs in _TAG_RE.findall(meta.group(1))
+        if tag == 'model' and not end
+    ]
+    # Go through the tags in the product and collect everything between
+    # the start and end of each time tag into a point. The attributes
+    # are kept as strings, grouped by the tag, and parsed afterwards:
+    points = []
+    point = None
+    nodes = {}
+    for end, tag, attrs in _TAG_RE.findall(raw_xml, product):
+        if end:
+            if tag == 'time':
+                if point is None:
+                    return None
+                points.append(point)
+                point = None
+            continue
+        attribs = dict(_ATTR_RE.findall(attrs))
+        if tag == 'time':
+            # Nested or empty time tags are not in the layout we expect,
+            # so these are left for lxml:
+            if point is not None or attrs.rstrip().endswith('/'):
+                return None
+            point = {tag: attribs}
+        elif point is not None:
+            point[tag] = attribs
+        else:
+            continue
+        nodes.setdefault(tag, []).append(attribs)
+    if not points or point is not None:
+        return None
+    _parse_attribute_columns(nodes)
+    return models, points
+
+
+def _iterparse_xml(raw_xml):
+    """Parse the given xml data with lxml.
+
+    Parameters
+    ----------
+    raw_xml : string or bytes
+        The raw xml data we are going to read.
+
     Returns
     -------
     models : list of dicts
@@ -153,23 +295,106 @@ def parse_xml(raw_xml):
         The forecast points found in the raw xml data.
 
     """
-    xml = etree.fromstring(raw_xml)
+    if isinstance(raw_xml, str):
+        raw_xml = raw_xml.encode('utf-8')
+    # The structure is fixed (weatherdata -> meta/product -> model/time),
+    # so we stream through the document and handle each model and time
+    # node when it is complete. Nodes we are done with are removed to
+    # keep the memory usage down.
     models = []
-    for node in xml.xpath('/weatherdata/meta/model'):
-        model = get_attributes(node)
-        models.append(model)
     points = []
-    for node in xml.xpath('/weatherdata/product/time'):
-        point = {}
-        point[node.tag] = get_attributes(node)
-        for i in node:
-            point[i.tag] = get_attributes(i)
-            for j in i:
-                point[j.tag] = get_attributes(j)
-        points.append(point)
+    context = etree.iterparse(
+        io.BytesIO(raw_xml), events=('end',), tag=('model', 'time')
+    )
+    for _, node in context:
+        parent = node.getparent()
+        if node.tag == 'model' and parent.tag == 'meta':
+            models.append(get_attributes(node))
+        elif node.tag == 'time' and parent.tag == 'product':
+            point = {node.tag: get_attributes(node)}
+            for child in node.iterdescendants():
+                point[child.tag] = get_attributes(child)
+            points.append(point)
+        else:
+            continue
+        node.clear()
+        while node.getprevious() is not None:
+            del parent[0]
+    return models, points
+
+
+def parse_xml(raw_xml):
+    """Parse the given xml data.
+
+    Parameters
+    ----------
+    raw_xml : string or bytes
+        The raw xml data we are going to read.
+
+    Returns
+    -------
+    models : list of dicts
+        The model information found in the raw xml data.
+    points : list of dicts
+        The forecast points found in the raw xml data. The times of the
+        points also contain the seconds since the epoch, as "from_ts"
+        and "to_ts".
+
+    """
+    text = raw_xml
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    parsed = _fast_parse_xml(text)
+    if parsed is None:
+        # Fall back to parsing with lxml:
+        parsed = _iterparse_xml(raw_xml)
+    models, points = parsed
+    # Store the times as seconds since the epoch as well, so that we
+    # can work with integers rather than date time objects:
+    for time in map(_GET_TIME, points):
+        time['from_ts'] = _unix_seconds(time['from'])
+        time['to_ts'] = _unix_seconds(time['to'])
     return models, points
 
 
+def _get_times(points, key='from_ts'):
+    """Get a time ("from", "to", "from_ts" or "to_ts") for the points."""
+    return list(map(itemgetter(key), map(_GET_TIME, points)))
+
+
+def get_columns(points, key=None):
+    """Collect the times, and optionally values, of points as arrays.
+
+    Parameters
+    ----------
+    points : list of dicts
+        The data points to consider.
+    key : string, optional
+        If given, the values for this key are also collected.
+
+    Returns
+    -------
+    columns : dict of numpy.arrays
+        The start ("time.from") and end ("time.to") times of the
+        points as numpy.datetime64 and, if a key is given, the values
+        for that key ("<key>.value").
+
+    """
+    columns = {
+        'time.from': np.array(
+            _get_times(points, 'from_ts'), dtype='datetime64[s]'
+        ).astype('datetime64[us]'),
+        'time.to': np.array(
+            _get_times(points, 'to_ts'), dtype='datetime64[s]'
+        ).astype('datetime64[us]'),
+    }
+    if key is not None:
+        columns['{}.value'.format(key)] = np.array(
+            [point[key]['value'] for point in points], dtype=np.float64
+        )
+    return columns
+
+
 def get_temperature_forecast(points):
     """Get temperature information from forecast data.
 
@@ -188,22 +413,20 @@ def get_temperature_forecast(points):
     # The temperature data will have different resolution, we will
     # use the time difference to the previous point in order to
     # group the forecast into different resolutions:
+    times = _get_times(temperature)
+    pairs = [
+        (time - prev, point)
+        for prev, time, point in zip(times, times[1:], temperature[1:])
+    ]
     temperature_forecast = {}
-    prev = None
-    for i, forecast in enumerate(temperature):
-        if i == 0:
-            # We don't know yet about this point. It will be assumed to be in
-            # the same group as the next point.
-            prev = forecast
-        else:
-            timei = forecast['time']['from']
-            timediff = int((timei - prev['time']['from']).total_seconds())
-            if timediff not in temperature_forecast:
-                temperature_forecast[timediff] = []
-            if i == 1:
-                temperature_forecast[timediff].append(prev)
-            temperature_forecast[timediff].append(forecast)
-        prev = forecast
+    for timediff, group in itertools.groupby(pairs, key=itemgetter(0)):
+        temperature_forecast.setdefault(timediff, []).extend(
+            point for _, point in group
+        )
+    if pairs:
+        # We don't know the resolution of the first point. It is assumed
+        # to be in the same group as the next point.
+        temperature_forecast[pairs[0][0]].insert(0, temperature[0])
     return temperature_forecast
 
 
@@ -226,12 +449,8 @@ def get_precipitation_forecast(points):
     # by its to and from values. We will first group by this.
     precipitation_forecast = {}
     for point in precipitation:
-        timediff = int(
-            (point['time']['to'] - point['time']['from']).total_seconds()
-        )
-        if timediff not in precipitation_forecast:
-            precipitation_forecast[timediff] = []
-        precipitation_forecast[timediff].append(point)
+        timediff = point['time']['to_ts'] - point['time']['from_ts']
+        precipitation_forecast.setdefault(timediff, []).append(point)
     return precipitation_forecast
 
 
@@ -241,20 +460,18 @@ def get_hourly(points, now, max_hours):
     Parameters
     ----------
     points : list of dicts
-        The data points to consider.
+        The data points to consider, sorted in time.
     now : object like datetime.datetime
         The current time.
     max_hours : int
         The max length in the future we are looking for.
 
     """
-    maxtime = datetime.timedelta(hours=max_hours)
-    selected = []
-    for point in points:
-        if (point['time']['from'] - now) > maxtime:
-            continue
-        selected.append(point)
-    return selected
+    # The points are sorted in time, so we can search for the last
+    # point to include:
+    cutoff = (now - _EPOCH) / _SECOND + max_hours * 3600
+    times = _get_times(points)
+    return points[:bisect.bisect_right(times, cutoff)]
 
 
 def get_start_time(points, time_zero):
@@ -263,7 +480,7 @@ def get_start_time(points, time_zero):
     Parameters
     ----------
     points : list of dicts
-        The data points to consider.
+        The data points to consider, sorted in time.
     time_zero : object like datetime.datetime
         The current time.
 
@@ -273,45 +490,57 @@ def get_start_time(points, time_zero):
         The time for the first forecast point.
 
     """
-    start = None
-    prev = None
-    for point in points:
-        if prev is None:
-            prev = point
-            continue
-        if prev['time']['from'] <= time_zero <= point['time']['from']:
-            start = prev['time']['from']
-            break
-        prev = point
-    return start
+    # The points are sorted in time, so we search for the first point
+    # at or after time zero and use the point before it:
+    times = _get_times(points)
+    zero = (time_zero - _EPOCH) / _SECOND
+    idx = bisect.bisect_left(times, zero)
+    if idx == 0 and times and times[0] == zero:
+        idx = 1
+    if idx == 0 or idx >= len(times):
+        return None
+    return points[idx - 1]['time']['from']
 
 
 def get_data(points, start, selection):
     """Extract data from points given a starting time."""
+    # The points are sorted in time, so we can search for the first
+    # point which is not before the start:
+    zero = (start - _EPOCH) / _SECOND
+    points = points[bisect.bisect_left(_get_times(points), zero):]
     data = {
-        'time': {'to': [], 'from': [], 'relative-seconds': []},
+        'time': {
+            'to': _get_times(points, 'to'),
+            'from': _get_times(points, 'from'),
+            'relative-seconds': [
+                time - zero for time in _get_times(points)
+            ],
+        },
     }
+    # Resolve the selection once, outside the loop over the points:
+    selected = [(key, tuple(sub_keys)) for key, sub_keys in selection.items()]
     for point in points:
-        rel_time = (point['time']['from'] - start).total_seconds()
-        if rel_time < 0:
-            continue
-        data['time']['to'].append(point['time']['to'])
-        data['time']['from'].append(point['time']['from'])
-        data['time']['relative-seconds'].append(rel_time)
-        for key, sub_keys in selection.items():
-            if key not in point:
+        for key, sub_keys in selected:
+            point_values = point.get(key)
+            if point_values is None:
                 continue
-            if key not in data:
-                data[key] = {}
+            values = data.setdefault(key, {})
             for sub_key in sub_keys:
-                if sub_key not in point[key]:
-                    continue
-                if sub_key not in data[key]:
-                    data[key][sub_key] = []
-                data[key][sub_key].append(point[key][sub_key])
+                if sub_key in point_values:
+                    value = point_values[sub_key]
+                    values.setdefault(sub_key, []).append(value)
     return data
 
 
+def _format_time(time):
+    """Format a date time object with TIME_OUT_FMT."""
+    # isoformat is faster than strftime and gives the same result
+    # for this format:
+    if _ISO_TIME_OUT:
+        return time.isoformat(' ', 'seconds')
+    return time.strftime(TIME_OUT_FMT)
+
+
 def add_precipitation_meta(data, place):
     """Add some interpretations of the precipitation data."""
     meta = {
@@ -319,23 +548,42 @@ def add_precipitation_meta(data, place):
         'lat': place['lat'],
         'lon': place['lon'],
     }
-    values = np.array(data['precipitation']['value'])
+    values = np.asarray(data['precipitation']['value'], dtype=np.float64)
     # When does it rain?
-    meta['rain'] = [int(i) for i in np.where(values > 0.0)[0]]
+    meta['rain'] = np.flatnonzero(values > 0.0).tolist()
     # How much will it rain?
-    meta['amount'] = sum(values)
+    meta['amount'] = float(values.sum())
     # Will it rain at all:
     meta['will-it-rain'] = len(meta['rain']) > 0
     # When does it start/stop?
     start, stop = None, None
     if meta['will-it-rain']:
-        start = data['time']['from'][meta['rain'][0]].strftime(TIME_OUT_FMT)
-        stop = data['time']['to'][meta['rain'][-1]].strftime(TIME_OUT_FMT)
+        start = _format_time(data['time']['from'][meta['rain'][0]])
+        stop = _format_time(data['time']['to'][meta['rain'][-1]])
     meta['rain-starts'] = start
     meta['rain-stops'] = stop
     data['meta'] = meta
 
 
+# Parsed forecasts, stored as {xml_file: (key, (models, points))} where
+# the key is the modification time and size of the file:
+_FORECAST_CACHE = {}
+
+
+def _load_forecast(xml_file):
+    """Read and parse a xml file, reusing the result if it is unchanged."""
+    stat = os.stat(xml_file)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _FORECAST_CACHE.get(xml_file)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(xml_file, 'rb') as inputfile:
+        raw_xml = inputfile.read()
+    parsed = parse_xml(raw_xml)
+    _FORECAST_CACHE[xml_file] = (key, parsed)
+    return parsed
+
+
 def read_xml_forecast(xml_file, now, place):
     """Parse a forecast from a xml file.
 
@@ -349,12 +597,7 @@ def read_xml_forecast(xml_file, now, place):
         Information about the location the forecast is for.
 
     """
-    raw_xml = None
-    with open(xml_file, 'r') as inputfile:
-        raw_xml = inputfile.read()
-    if raw_xml is None:
-        pass
-    _, points = parse_xml(raw_xml)
+    _, points = _load_forecast(xml_file)
     temperature = get_temperature_forecast(points)
     precipitation = get_precipitation_forecast(points)
 
@@ -387,7 +630,7 @@ def read_xml_forecast(xml_file, now, place):
         plot_temperature_forecast(temperature, now)
         plot_precipitation_forecast(precipitation, now)
         plot_hourly(temperature_hour, precipitation_hour, now)
-        plt.show()
+        _get_pyplot().show()
     return precipitation_data, chart
 
 
@@ -408,32 +651,45 @@ def get_times_and_values(points, key, time_zero):
     times : numpy.array of floats
         The times (in seconds) relative to the given zero point for the
         time.
+    times_from : numpy.array of numpy.datetime64
+        The start times of the given data points.
     width : numpy.array of floats
         The width of the time intervals in the given data points.
     values : numpy.array of floats
         The values found in the given data points.
+    start : integer
+        The index of the first point which is not before the zero
+        point for the time.
 
     """
-    times = []
-    width = []
-    values = []
-    times_from = []
-    for point in points:
-        times.append(
-            (point['time']['from'] - time_zero).total_seconds()
-        )
-        width.append(
-            (point['time']['to'] - point['time']['from']).total_seconds()
-        )
-        values.append(point[key]['value'])
-        times_from.append(point['time']['from'])
-    times = np.array(times)
-    start = np.where(times >= 0)[0][0]
-    return times, times_from, np.array(width), np.array(values), start
+    columns = get_columns(points, key=key)
+    time_from = columns['time.from']
+    second = np.timedelta64(1, 's')
+    times = (time_from - np.datetime64(time_zero, 'us')) / second
+    width = (columns['time.to'] - time_from) / second
+    start = np.flatnonzero(times >= 0)[0]
+    return (
+        times,
+        time_from,
+        width,
+        columns['{}.value'.format(key)],
+        start,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pyplot():
+    """Import pyplot and set up the style for the plots."""
+    # matplotlib is only needed for the plots made when debugging, so
+    # it is imported here to keep the import of this module light:
+    from matplotlib import pyplot as plt
+    plt.style.use('seaborn-talk')
+    return plt
 
 
 def plot_temperature_forecast(temperature, time_zero):
     """Make a simple plot of the temperature forecast."""
+    plt = _get_pyplot()
     fig = plt.figure()
     ax1 = fig.add_subplot(111)
     for resolution, forecast in temperature.items():
@@ -447,6 +703,9 @@ def plot_temperature_forecast(temperature, time_zero):
 
 def plot_precipitation_forecast(precipitation, time_zero):
     """Make a simple plot of the precipitation forecast."""
+    from matplotlib.cm import get_cmap
+    from matplotlib.gridspec import GridSpec
+    plt = _get_pyplot()
     colors = get_cmap(name='tab10')(np.linspace(0, 1, 10))
     fig = plt.figure()
     ncol = 1 if len(precipitation) < 3 else 2
@@ -466,6 +725,7 @@ def plot_precipitation_forecast(precipitation, time_zero):
 
 def plot_hourly(temperature, precipitation, time_zero):
     """Make a plot of hourly temperature and precipitation data."""
+    plt = _get_pyplot()
     fig = plt.figure()
     ax1 = fig.add_subplot(111)
     times, _, _, values, _ = get_times_and_values(
@@ -482,9 +742,13 @@ def plot_hourly(temperature, precipitation, time_zero):
 
 def plot_hourly_altair(temperature, precipitation, time_zero, name):
     """Make a plot of hourly temperature and precipitation data."""
+    # Imported here to keep the import of this module light:
+    import altair as alt
     _, times_t, _, values_t, start = get_times_and_values(
         temperature, 'temperature', time_zero
     )
+    # The times and values are typed numpy arrays (datetime64 and
+    # float64), so pandas does not have to infer the column types:
     source_t = pd.DataFrame(
         {
             'hours': times_t[start:],
@@ -519,8 +783,7 @@ def plot_hourly_altair(temperature, precipitation, time_zero, name):
 
 def main():
     """Do some example things."""
-    with open('places.json', 'r') as json_file:
-        places = json.load(json_file)
+    places = read_json_file('places.json')
     now = datetime.datetime(2019, 9, 4, 12, 22, 59, 855905)
     for place in places:
         xml_file = '{}.xml'.format(place['name'])
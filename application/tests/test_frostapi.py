@@ -0,0 +1,49 @@
+# Copyright (c) 2019, Anders Lervik.
+# Distributed under the MIT License. See LICENSE for more info.
+"""Test the selection of the closest Frost stations."""
+import numpy as np
+import frostapi
+
+
+PLACES = [
+    {'name': 'Trondheim', 'lon': 10.3951, 'lat': 63.4305},
+    {'name': 'Hell', 'lon': 10.8973, 'lat': 63.4448},
+    {'name': 'Støren', 'lon': 10.2863, 'lat': 63.0365},
+    {'name': 'Ekne', 'lon': 11.0213, 'lat': 63.6998, 'masl': 25.0},
+]
+
+
+def make_sources():
+    """Create sources on a slightly irregular grid around Trondheim."""
+    sources = []
+    for i in range(40):
+        for j in range(35):
+            sources.append(
+                {
+                    'id': 'SN{}'.format(100 * i + j),
+                    'name': 'Station {} {}'.format(i, j),
+                    'geometry': {
+                        'coordinates': [
+                            9.5 + 0.037 * i + 0.011 * (j % 3),
+                            62.9 + 0.023 * j + 0.007 * (i % 4),
+                        ],
+                    },
+                    'masl': float((7 * i + 13 * j) % 400),
+                }
+            )
+    return sources
+
+
+def test_single_precision_positions():
+    """Test that the closest stations are the same in single precision."""
+    data = frostapi.get_source_data(make_sources())
+    assert data['pos'].dtype == np.float32
+    pos64 = frostapi._to_cartesian(data['lon'], data['lat'], data['masl'])
+    assert pos64.dtype == np.float64
+    for place in PLACES:
+        idx32, dist32 = frostapi.get_closest_sources(
+            place, data['pos'], number=3
+        )
+        idx64, dist64 = frostapi.get_closest_sources(place, pos64, number=3)
+        assert list(data['ids'][idx32]) == list(data['ids'][idx64])
+        assert np.allclose(dist32, dist64, atol=2.0)
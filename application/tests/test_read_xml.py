@@ -0,0 +1,100 @@
+# Copyright (c) 2019, Anders Lervik.
+# Distributed under the MIT License. See LICENSE for more info.
+"""Test the parsing of the MET Norway xml data."""
+import read_xml
+
+
+MODEL = (
+    '<model name="met_public_forecast" termin="2019-09-04T06:00:00Z" '
+    'runended="2019-09-04T08:00:00Z" nextrun="2019-09-04T16:00:00Z" '
+    'from="2019-09-04T10:00:00Z" to="2019-09-07T00:00:00Z" />'
+)
+
+TEMPERATURE = (
+    '<time datatype="forecast" from="2019-09-04T{0}:00:00Z" '
+    'to="2019-09-04T{0}:00:00Z">'
+    '<location altitude="12" latitude="63.4427" longitude="10.9464">'
+    '<temperature id="TTT" unit="celsius" value="1{0}.5"/>'
+    '<windSpeed id="ff" mps="3.1" beaufort="2" name="Svak vind"/>'
+    '</location>'
+    '</time>'
+)
+
+PRECIPITATION = (
+    '<time datatype="forecast" from="2019-09-04T{0}:00:00Z" '
+    'to="2019-09-04T{1}:00:00Z">'
+    '<location altitude="12" latitude="63.4427" longitude="10.9464">'
+    '<precipitation unit="mm" value="0.{0}" minvalue="0.0" maxvalue="1.2"/>'
+    '<symbol id="Rain" number="{1}"/>'
+    '</location>'
+    '</time>'
+)
+
+
+def make_xml(times):
+    """Create a forecast document with the given time tags."""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<weatherdata created="2019-09-04T10:00:00Z">'
+        '<meta>{}</meta>'
+        '<product class="pointData">{}</product>'
+        '</weatherdata>'
+    ).format(MODEL, ''.join(times))
+
+
+def regular_times():
+    """Time tags with the layout of the MET Norway forecasts."""
+    times = []
+    for hour in (10, 11, 12):
+        times.append(TEMPERATURE.format(hour))
+        times.append(PRECIPITATION.format(hour, hour + 1))
+    return times
+
+
+def test_fast_parse_matches_lxml():
+    """Test that both parsers give the same result for a forecast."""
+    raw_xml = make_xml(regular_times())
+    fast = read_xml._fast_parse_xml(raw_xml)
+    assert fast is not None
+    assert fast == read_xml._iterparse_xml(raw_xml)
+    models, points = fast
+    assert models[0]['name'] == 'met_public_forecast'
+    assert len(points) == 6
+    assert points[0]['windSpeed']['beaufort'] == 2
+    assert points[1]['symbol']['number'] == 11
+    assert points[1]['precipitation']['value'] == 0.1
+
+
+def parse_with_lxml(raw_xml, monkeypatch):
+    """Parse the given xml data, only using lxml."""
+    with monkeypatch.context() as patch:
+        patch.setattr(read_xml, '_fast_parse_xml', lambda raw_xml: None)
+        return read_xml.parse_xml(raw_xml)
+
+
+def test_nested_time_falls_back(monkeypatch):
+    """Test that a time tag inside another one is parsed with lxml."""
+    times = regular_times()
+    times[1] = times[1].replace('</location>', '</location>' + times[2])
+    del times[2]
+    raw_xml = make_xml(times)
+    assert read_xml._fast_parse_xml(raw_xml) is None
+    assert read_xml.parse_xml(raw_xml) == parse_with_lxml(
+        raw_xml, monkeypatch
+    )
+
+
+def test_empty_time_falls_back(monkeypatch):
+    """Test that a self-closing time tag is parsed with lxml."""
+    times = regular_times()
+    times.insert(
+        2,
+        '<time datatype="forecast" from="2019-09-04T10:30:00Z" '
+        'to="2019-09-04T10:30:00Z"/>'
+    )
+    raw_xml = make_xml(times)
+    assert read_xml._fast_parse_xml(raw_xml) is None
+    _, points = read_xml.parse_xml(raw_xml)
+    assert points == parse_with_lxml(raw_xml, monkeypatch)[1]
+    assert len(points) == 7
+    assert list(points[2]) == ['time']
@@ -0,0 +1,41 @@
+# Copyright (c) 2019, Anders Lervik.
+# Distributed under the MIT License. See LICENSE for more info.
+"""Set the view of a folium map from url parameters."""
+import textwrap
+from branca.element import MacroElement
+from jinja2 import Template
+
+
+class UrlParamZoom(MacroElement):
+    """Set the location and zoom of a Leaflet map from url parameters.
+
+    The parameters ``lat``, ``lon`` and ``zoom`` are read from the url,
+    and the given defaults are used for parameters that are missing.
+    """
+
+    _template = Template(textwrap.dedent("""
+        {% macro script(this,kwargs) %}
+        var params = {};
+        window.location.href.replace(
+            /[?&]+([^=&]+)=([^&]*)/gi,
+            function(m, key, value) {
+                params[key] = value;
+            }
+        );
+        {{this._parent.get_name()}}.setView(
+            [
+                Number(params.lat) || {{this.lat}},
+                Number(params.lon) || {{this.lon}}
+            ],
+            Number(params.zoom) || {{this.zoom}}
+        );
+        {% endmacro %}
+        """), trim_blocks=True, lstrip_blocks=True)
+
+    def __init__(self, location, zoom):
+        """Set up the default location and zoom."""
+        super().__init__()
+        self._name = 'UrlParamZoom'
+        self.lat = location[0]
+        self.lon = location[1]
+        self.zoom = zoom